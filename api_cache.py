@@ -0,0 +1,85 @@
+"""
+Persistent cache for external API lookups (TMDB, OMDB).
+
+Entries are JSON values stored in a single SQLite file with a per-entry
+expiry, so cached answers survive restarts and are shared by every
+gunicorn worker. Cache failures are never fatal — a broken or locked
+database simply behaves like a miss.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+MISSING = object()
+
+
+class DiskCache:
+    """Key/value store of JSON-serialisable values backed by SQLite."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread (and per process, so forked workers never
+        # share a handle opened by their parent).
+        pid, conn = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            # WAL lets readers proceed while another worker writes; NORMAL sync
+            # is plenty for a cache that can always be refetched.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def get(self, key: str, default=MISSING):
+        """Return the cached value for *key*, or *default* if absent/expired."""
+        try:
+            row = self._conn().execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return default
+        if row is None or row[1] < time.time():
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires),
+                )
+        except sqlite3.Error:
+            pass
+
+    def prune(self) -> None:
+        """Delete expired entries; ``get`` only skips them."""
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM cache")
+        except sqlite3.Error:
+            pass
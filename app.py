@@ -1,17 +1,58 @@
+import fcntl
+import heapq
 import json
 import os
 import random
 import re
 import threading
-from functools import lru_cache
-from urllib.parse import quote_plus
-
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, wraps
+from operator import itemgetter
+from types import MappingProxyType
+from urllib.parse import quote_plus, urlencode
+
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from apscheduler.schedulers.background import BackgroundScheduler
 from flask import Flask, jsonify, render_template, request
+from flask.json.provider import DefaultJSONProvider
+
+from api_cache import MISSING, DiskCache
+
+try:
+    import pyarrow
+except ImportError:  # optional: only used when FAST_IO=1
+    pyarrow = None
+
+try:
+    import orjson
+except ImportError:  # pinned in requirements.txt; Flask's encoder is the fallback
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson, keeping sorted keys.
+
+    Anything orjson cannot encode falls back to Flask's default encoder.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -19,6 +60,11 @@ app = Flask(__name__)
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "2073a6aadc1cb24381bc90c83ace363a")
 OMDB_API_KEY = os.environ.get("OMDB_API_KEY", "b9a5e69d")
 DATA_DIR = os.environ.get("DATA_DIR", ".")
+# Parse CSVs with the multithreaded Arrow reader and keep typed Parquet
+# copies next to them for later loads (requires pyarrow).
+FAST_IO = os.environ.get("FAST_IO", "") == "1"
+# Seconds a rendered page is reused before re-running predictions/lookups (0 disables).
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
 
 SUPERHERO_KEYWORDS = {
     "spider-man", "batman", "superman", "iron man", "captain america",
@@ -28,13 +74,53 @@ SUPERHERO_KEYWORDS = {
     "venom", "doctor strange", "black panther", "shazam",
 }
 
-GENRE_ID_TO_NAME = {
+# One keep-alive session shared by all request threads, plus a small pool for
+# fanning out independent lookups (each call just waits on the network).
+HTTP_WORKERS = 16
+# The enrichment prebuild gets its own few threads so it never queues ahead
+# of visitor lookups on the shared pool.
+ENRICHMENT_WORKERS = 4
+
+# Transient upstream errors get two quick retries. raise_on_status=False
+# hands the last response back, so callers keep checking status_code.
+_http_retry = Retry(
+    total=2, backoff_factor=0.1, status_forcelist=(429, 502, 503, 504), raise_on_status=False
+)
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_http_retry))
+_http.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_http_retry))
+_http_pool = ThreadPoolExecutor(max_workers=HTTP_WORKERS, thread_name_prefix="http")
+
+# TMDB/OMDB answers barely change, so keep them on disk across restarts.
+_api_cache = DiskCache(os.path.join(DATA_DIR, "api_cache.sqlite"))
+
+# Read-only: shared by every request thread.
+GENRE_ID_TO_NAME = MappingProxyType({
     18: "Drama", 53: "Thriller", 9648: "Mystery", 80: "Crime",
     10402: "Music", 28: "Action", 35: "Comedy", 27: "Horror",
     878: "Science Fiction", 10749: "Romance", 16: "Animation",
     99: "Documentary", 14: "Fantasy", 36: "History", 37: "Western",
     10752: "War",
-}
+})
+
+# Title helpers run once per film/recommendation, so compile their patterns once.
+_YEAR_RE = re.compile(r"\((\d{4})\)")
+_YEAR_STRIP_RE = re.compile(r"\s*\(\d{4}\)\s*")
+# Punctuation dropped when matching titles; translate strips it in one C pass.
+_TITLE_PUNCT_TABLE = str.maketrans("", "", ",:'\"")
+# One alternation pass instead of a substring scan per keyword. Whole words
+# only, so "Thor" does not catch "Thoroughbreds" nor "Flash" "Flashdance".
+_SUPERHERO_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(SUPERHERO_KEYWORDS))) + r")\b", re.IGNORECASE
+)
+
+_WIKI_LOCATION_RE = re.compile(
+    r"(?:filmed|shot|produced)\s+(?:in|at)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE
+)
+_WIKI_PRODUCTION_RE = re.compile(
+    r"(?:production|filming)\s+(?:began|started|took|lasted)\s+([^\.]+)", re.IGNORECASE
+)
+_WIKI_CAMERA_RE = re.compile(r"(?:shot|filmed)\s+(?:on|with|using)\s+([^\.]+)", re.IGNORECASE)
 
 # ---------------------------------------------------------------------------
 # Jinja filters
@@ -47,53 +133,431 @@ def urlencode_filter(s):
 
 @app.template_filter("tojsonfilter")
 def tojson_filter(data):
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        except TypeError:
+            pass
     return json.dumps(data)
 
 # ---------------------------------------------------------------------------
 # Data loading (cached so CSVs are only read once per process)
 # ---------------------------------------------------------------------------
 
-@lru_cache(maxsize=1)
+REC_FILES = (
+    "movie_recommendations_improved.csv",
+    "genre_recommendations.csv",
+    "tv_recommendations.csv",
+)
+FILM_FILES = (
+    "gorg_scraped_films.csv",
+    "salicore_scraped_films.csv",
+)
+DATA_FILES = REC_FILES + FILM_FILES
+
+
 def _load_csv(path: str) -> pd.DataFrame:
     """Read a single CSV, returning an empty DataFrame on any error."""
     try:
+        if FAST_IO and pyarrow is not None:
+            return _load_parquet_copy(path)
         return pd.read_csv(path)
     except Exception:
         return pd.DataFrame()
 
 
+def _load_parquet_copy(path: str) -> pd.DataFrame:
+    """Read *path* via its Parquet copy, (re)writing the copy when stale.
+
+    The CSV stays the source of truth (the pipeline writes CSVs); the copy
+    is refreshed whenever it is older than the CSV.
+    """
+    parquet = os.path.splitext(path)[0] + ".parquet"
+    mtime = _mtime(parquet)
+    if mtime is not None and mtime >= os.path.getmtime(path):
+        try:
+            return pd.read_parquet(parquet, engine="pyarrow")
+        except Exception:
+            pass
+    df = pd.read_csv(path, engine="pyarrow")
+    try:
+        tmp = f"{parquet}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, engine="pyarrow", index=False)
+        os.replace(tmp, parquet)
+    except Exception:
+        pass
+    return df
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _prepare_films(df: pd.DataFrame) -> pd.DataFrame:
+    """Add derived lookup columns to a scraped-films frame.
+
+    ``_key`` is the lowercased title used for the both-loved join,
+    ``_norm_title`` the normalised title used for prediction matching and
+    ``_year`` the ``(YYYY)`` year embedded in the title (NaN if absent).
+
+    When ratings are present, ``df.attrs["films"]`` also carries what the
+    prediction engine needs as plain parallel arrays over the rated films
+    (watched-but-unrated rows carry no evidence): ``titles`` and int8
+    ``half_stars`` (the rating times two, 0..10), plus ``title_index`` mapping
+    a normalised title to the position of its first occurrence and ``by_year``
+    mapping each year to the positions of films from that year. ``top_loved``
+    holds the cleaned titles of the user's two highest-rated 4+ films, the
+    fallback reason.
+    """
+    if df.empty:
+        return df
+    if "film_title" in df.columns:
+        titles = df["film_title"]
+        df["_key"] = titles.astype("string").str.lower()
+        df["_norm_title"] = titles.map(_normalize_title)
+        df["_year"] = pd.to_numeric(titles.astype(str).str.extract(_YEAR_RE)[0])
+        if "rating" in df.columns:
+            rated = df[df["rating"].notna()]
+            norms = rated["_norm_title"].tolist()
+            years = rated["_year"].fillna(0).to_numpy(np.int16)
+            df.attrs["films"] = {
+                "titles": rated["film_title"].to_numpy(),
+                "half_stars": (rated["rating"].to_numpy() * 2).round().astype(np.int8),
+                "title_index": {t: i for i, t in reversed(list(enumerate(norms)))},
+                "by_year": {
+                    int(y): pos.tolist()
+                    for y, pos in pd.Series(years).groupby(years).indices.items() if y
+                },
+                "top_loved": [
+                    _clean_title(t) for t in df[df["rating"] >= 4.0].nlargest(2, "rating")["film_title"]
+                ],
+            }
+    return df
+
+
+def _prepare_recs(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply clean_rec's frame-wide rules once at load.
+
+    Rows clean_rec would reject (non-string or superhero titles) are dropped
+    and missing overviews filled. The ranking columns are coerced:
+    unparseable counts become 1.0 and unparseable TMDB ratings 0.0, while
+    genuinely missing values stay NaN. Years become ints (0 when unknown)
+    and genre columns categoricals.
+    clean_rec still finalises each record.
+    """
+    if df.empty:
+        return df
+    if "title" not in df.columns:
+        return df.iloc[0:0]
+    is_str = df["title"].map(lambda t: isinstance(t, str))
+    df = df[is_str & ~df["title"].where(is_str, "").str.contains(_SUPERHERO_RE)].copy()
+
+    overview = df["overview"] if "overview" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    df["overview"] = overview.where(overview.map(lambda x: isinstance(x, str)), "No overview available")
+    for col, default in (("recommendation_count", 1.0), ("tmdb_rating", 0.0)):
+        if col not in df.columns:
+            df[col] = default
+            continue
+        raw = df[col]
+        num = pd.to_numeric(raw, errors="coerce")
+        df[col] = num.where(num.notna() | raw.isna(), default).astype(float)
+    if "year" in df.columns:
+        # One blank year makes pandas read the column as floats (1992.0, NaN).
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").fillna(0).astype(int)
+    # Genre labels repeat across most rows; a category column stores each once.
+    for col in ("genre", "genre_ids"):
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _rank_recs(df: pd.DataFrame) -> pd.DataFrame:
+    """Order a prepared recs frame like _sort_recs(..., "recommendation_count").
+
+    Multi-column sort_values is stable, so ties keep file order as sorted()
+    does.
+    """
+    if df.empty:
+        return df
+    return df.sort_values(["recommendation_count", "tmdb_rating"], ascending=False)
+
+
+def _top_recs(df: pd.DataFrame, n: int) -> list[dict]:
+    """The first *n* valid recs of a ranked frame, cleaning only the rows needed."""
+    top = []
+    for start in range(0, len(df), n):
+        top += _clean_list(df.iloc[start:start + n].to_dict("records"))
+        if len(top) >= n:
+            break
+    return top[:n]
+
+
+@lru_cache(maxsize=1)
+def _load_rec_frames(stamps: tuple) -> tuple:
+    return tuple(_prepare_recs(_load_csv(path)) for path, _ in stamps)
+
+
+@lru_cache(maxsize=1)
+def _load_film_frames(stamps: tuple) -> tuple:
+    return tuple(_prepare_films(_load_csv(path)) for path, _ in stamps)
+
+
 def load_data():
-    """Return (recommendations, genre_recs, tv_recs, gorg_films, sali_films)."""
-    d = DATA_DIR
-    return (
-        _load_csv(os.path.join(d, "movie_recommendations_improved.csv")),
-        _load_csv(os.path.join(d, "genre_recommendations.csv")),
-        _load_csv(os.path.join(d, "tv_recommendations.csv")),
-        _load_csv(os.path.join(d, "gorg_scraped_films.csv")),
-        _load_csv(os.path.join(d, "salicore_scraped_films.csv")),
-    )
+    """Return (recommendations, genre_recs, tv_recs, gorg_films, sali_films).
+
+    The parsed frames are shared across requests. The cache key carries each
+    file's mtime, so CSVs rewritten by the pipeline are picked up on the next
+    request without an explicit invalidation.
+    """
+    return _load_rec_frames(_data_stamps(REC_FILES)) + load_user_films()
+
+
+def load_user_films() -> tuple:
+    """Return (gorg_films, sali_films) without touching the recommendation CSVs."""
+    return _load_film_frames(_data_stamps(FILM_FILES))
+
+
+def _data_stamps(files: tuple) -> tuple:
+    paths = (os.path.join(DATA_DIR, f) for f in files)
+    return tuple((p, _mtime(p)) for p in paths)
+
+
+@lru_cache(maxsize=1)
+def _load_records(stamps: tuple) -> tuple:
+    recs, genre, tv = _load_rec_frames(stamps)
+    return tuple(_clean_list(df.to_dict("records")) if not df.empty else [] for df in (recs, genre, tv))
+
+
+def load_records() -> tuple:
+    """Return cleaned (recommendations, genre_recs, tv_recs) record lists.
+
+    The to_dict/clean_rec pass runs once per data load. Each call hands out
+    shallow copies, so routes are free to annotate the records.
+    """
+    return tuple([dict(r) for r in records] for records in _load_records(_data_stamps(REC_FILES)))
+
+
+def _genre_keys(rec: dict) -> frozenset:
+    """Lowercased genre names a rec answers to (its genre plus its genre_ids)."""
+    keys = set()
+    genre = rec.get("genre")
+    if isinstance(genre, str) and genre:
+        keys.add(genre.lower())
+    genre_ids = rec.get("genre_ids", "")
+    if genre_ids:
+        for g in str(genre_ids).split(","):
+            name = GENRE_ID_TO_NAME.get(int(g)) if g.strip().isdigit() else None
+            if name:
+                keys.add(name.lower())
+    return frozenset(keys)
+
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _inverted_index(keys_per_row) -> dict:
+    """``{key: sorted row positions}`` for rows that each carry several keys."""
+    index: dict = {}
+    for i, keys in enumerate(keys_per_row):
+        for key in keys:
+            index.setdefault(key, []).append(i)
+    return {key: np.array(rows, dtype=np.intp) for key, rows in index.items()}
+
+
+@lru_cache(maxsize=1)
+def _load_pools(stamps: tuple) -> dict:
+    main, genre, tv = _load_records(stamps)
+    pools = {"tv": tv, "movies": _merge_genre_recs(list(main), genre), "all": main + genre + tv}
+    indexed = {}
+    for name, recs in pools.items():
+        years = _years(recs)
+        by_decade = _inverted_index((y,) for y in years // 10 * 10)
+        by_genre = _inverted_index(_genre_keys(r) for r in recs)
+        indexed[name] = (recs, years, by_decade, by_genre)
+    return indexed
+
+
+def select_records(content_type: str, decade: str = "", genre: str = "") -> list[dict]:
+    """Copies of the recs of one content type ("tv", "movies" or "all") matching the filters.
+
+    Each pool keeps decade -> rows and genre -> rows indexes built once per
+    data load, so a request only intersects two short position arrays and
+    copies the records that survive.
+    """
+    pools = _load_pools(_data_stamps(REC_FILES))
+    recs, years, by_decade, by_genre = pools.get(content_type, pools["all"])
+    rows = np.arange(len(recs))
+    if decade:
+        start = int(decade)
+        if start % 10 == 0:
+            rows = by_decade.get(start, _NO_ROWS)
+        else:
+            rows = np.flatnonzero((years >= start) & (years < start + 10))
+    if genre:
+        rows = np.intersect1d(rows, by_genre.get(genre.lower(), _NO_ROWS), assume_unique=True)
+    return [dict(recs[i]) for i in rows]
+
+
+ENRICHMENT_FILE = "enriched.json"
+
+
+@lru_cache(maxsize=1)
+def _load_enrichment_file(path: str, mtime: float | None) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_enrichment() -> dict:
+    """Return the prebuilt ``{"posters": ..., "ratings": ...}`` sidecar (may be empty)."""
+    path = os.path.join(DATA_DIR, ENRICHMENT_FILE)
+    return _load_enrichment_file(path, _mtime(path))
+
+
+def warm_caches() -> None:
+    """Parse the CSVs and build the record pools ahead of the first request."""
+    load_data()
+    _load_pools(_data_stamps(REC_FILES))
+    load_enrichment()
 
 
 def invalidate_cache():
     """Call this after regenerating CSVs to force a fresh load."""
-    _load_csv.cache_clear()
+    _load_rec_frames.cache_clear()
+    _load_film_frames.cache_clear()
+    _load_records.cache_clear()
+    _load_pools.cache_clear()
+    _load_enrichment_file.cache_clear()
+    _both_loved_all.cache_clear()
+    _response_cache.clear()
+
+# ---------------------------------------------------------------------------
+# Response cache (rendered pages and API answers shared by every visitor)
+# ---------------------------------------------------------------------------
+
+RESPONSE_CACHE_MAX = 256  # entries; API keys include the query string
+
+_response_cache: dict = {}
+_inflight: dict = {}
+_inflight_lock = threading.Lock()
+
+
+def _data_version() -> tuple:
+    paths = [os.path.join(DATA_DIR, f) for f in (*DATA_FILES, ENRICHMENT_FILE)]
+    return tuple(_mtime(p) for p in paths)
+
+
+def cached_page(ttl: int | None = None):
+    """Reuse a view's rendered output for *ttl* seconds (default RESPONSE_CACHE_TTL).
+
+    RESPONSE_CACHE_TTL=0 turns this off for every page, including those
+    given an explicit *ttl*.
+
+    Entries are keyed on the request path, so only use this on views that
+    ignore the query string and render the same page for everyone. An entry
+    is also dropped as soon as any data file or the enrichment sidecar
+    changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            timeout = RESPONSE_CACHE_TTL if ttl is None or RESPONSE_CACHE_TTL <= 0 else ttl
+            if timeout <= 0:
+                return view(*args, **kwargs)
+            version = _data_version()
+            body = _cache_get(request.path, version)
+            if body is MISSING:
+                body = view(*args, **kwargs)
+                _cache_put(request.path, version, timeout, body)
+            return body
+        return wrapper
+    return decorator
+
+
+def shared_response(ttl: int = 30, bypass=None):
+    """Coalesce identical API requests and reuse the answer for *ttl* seconds.
+
+    Requests are keyed on path plus the sorted query string. While one
+    request computes a key, concurrent identical requests wait for its
+    result instead of repeating the work (single-flight). Successful
+    answers are then served from the response cache until *ttl* expires or
+    the data changes. Requests for which ``bypass()`` is true (e.g. random
+    picks) always run the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if bypass is not None and bypass():
+                return view(*args, **kwargs)
+            key = (request.path, urlencode(sorted(request.args.items(multi=True))))
+            version = _data_version()
+            hit = _cache_get(key, version)
+            if hit is not MISSING:
+                return app.response_class(hit[0], status=hit[1], mimetype=hit[2])
+
+            with _inflight_lock:
+                future = _inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = _inflight[key] = Future()
+            if not leader:
+                data, status, mimetype = future.result()
+                return app.response_class(data, status=status, mimetype=mimetype)
+
+            try:
+                resp = app.make_response(view(*args, **kwargs))
+                answer = (resp.get_data(), resp.status_code, resp.mimetype)
+                future.set_result(answer)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with _inflight_lock:
+                    del _inflight[key]
+            if resp.status_code == 200:
+                _cache_put(key, version, ttl, answer)
+            return resp
+        return wrapper
+    return decorator
+
+
+def _cache_get(key, version):
+    hit = _response_cache.get(key)
+    if hit is not None and hit[0] == version and hit[1] > time.monotonic():
+        return hit[2]
+    return MISSING
+
+
+def _cache_put(key, version, ttl: int, value) -> None:
+    if len(_response_cache) >= RESPONSE_CACHE_MAX:
+        now = time.monotonic()
+        for k, (v, expires, _) in list(_response_cache.items()):
+            if v != version or expires <= now:
+                _response_cache.pop(k, None)
+        if len(_response_cache) >= RESPONSE_CACHE_MAX:
+            _response_cache.clear()
+    _response_cache[key] = (version, time.monotonic() + ttl, value)
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 def _clean_title(title) -> str:
-    return re.sub(r"\s*\(\d{4}\)\s*", "", str(title or "")).strip()
+    return _YEAR_STRIP_RE.sub("", str(title or "")).strip()
 
 
+@lru_cache(maxsize=65536)
 def _normalize_title(title) -> str:
-    t = _clean_title(title).lower()
-    return re.sub(r"[,:'\"]+", "", t).strip()
+    return _clean_title(title).lower().translate(_TITLE_PUNCT_TABLE).strip()
 
 
 def _is_superhero(title: str) -> bool:
-    lower = title.lower()
-    return any(kw in lower for kw in SUPERHERO_KEYWORDS)
+    return _SUPERHERO_RE.search(title) is not None
 
 
 def clean_rec(rec: dict) -> dict | None:
@@ -106,29 +570,23 @@ def clean_rec(rec: dict) -> dict | None:
     if _is_superhero(title):
         return None
 
-    overview = rec.get("overview")
-    if not isinstance(overview, str) or (isinstance(overview, float) and pd.isna(overview)):
+    if not isinstance(rec.get("overview"), str):
         rec["overview"] = "No overview available"
-    else:
+
+    poster = rec.get("poster_url")
+    # Strings are never NA, so only other values need pd.isna.
+    if not isinstance(poster, str):
         try:
-            if pd.isna(overview):
-                rec["overview"] = "No overview available"
+            rec["poster_url"] = None if (poster is None or pd.isna(poster)) else poster
         except (TypeError, ValueError):
             pass
 
-    poster = rec.get("poster_url")
-    try:
-        rec["poster_url"] = None if (poster is None or pd.isna(poster)) else poster
-    except (TypeError, ValueError):
-        pass
-
-    if "recommendation_count" not in rec:
-        rec["recommendation_count"] = 1
     if "recommended_because" not in rec:
         rec["recommended_because"] = rec.get("genre", "Your rating history")
 
+    # Both ranking fields leave here as floats, so sort keys read them as-is.
     try:
-        rec["recommendation_count"] = float(rec["recommendation_count"])
+        rec["recommendation_count"] = float(rec.get("recommendation_count", 1.0))
     except (ValueError, TypeError):
         rec["recommendation_count"] = 1.0
 
@@ -141,63 +599,250 @@ def clean_rec(rec: dict) -> dict | None:
 
 
 def _clean_list(records: list[dict]) -> list[dict]:
-    return [r for r in (clean_rec(rec) for rec in records) if r is not None]
+    return [cleaned for rec in records if (cleaned := clean_rec(rec)) is not None]
+
+
+def _years(recs: list[dict]) -> np.ndarray:
+    # _prepare_recs stores years as ints, 0 when unknown
+    return np.fromiter((r.get("year", 0) for r in recs), dtype=np.int64, count=len(recs))
+
+
+def _column(recs: list[dict], key: str) -> np.ndarray:
+    # clean_rec guarantees both ranking fields are present floats
+    return np.fromiter(map(itemgetter(key), recs), dtype=float, count=len(recs))
 
 
 def _sort_recs(recs: list[dict], sort_by: str) -> list[dict]:
+    """Return *recs* ordered for one of the sort_by options.
+
+    The keys are pulled into NumPy columns and ordered with stable sorts.
+    Descending keys are negated rather than reversed, so ties keep list
+    order as sorted(..., reverse=True) does. NaN keys sort last, as in
+    _rank_recs.
+    """
     if sort_by == "rating":
-        return sorted(recs, key=lambda x: x.get("tmdb_rating", 0), reverse=True)
-    if sort_by == "year":
-        return sorted(recs, key=lambda x: int(x.get("year", 0)) if str(x.get("year", 0)).isdigit() else 0, reverse=True)
-    if sort_by == "year_oldest":
-        return sorted(recs, key=lambda x: int(x.get("year", 0)) if str(x.get("year", 0)).isdigit() else 0)
-    if sort_by == "title":
-        return sorted(recs, key=lambda x: x.get("title", "").lower())
-    # Default: recommendation_count + tmdb_rating
-    return sorted(recs, key=lambda x: (x.get("recommendation_count", 0), x.get("tmdb_rating", 0)), reverse=True)
+        order = np.argsort(-_column(recs, "tmdb_rating"), kind="stable")
+    elif sort_by in ("year", "year_oldest"):
+        years = _years(recs)
+        order = np.argsort(-years if sort_by == "year" else years, kind="stable")
+    elif sort_by == "title":
+        titles = np.array([r.get("title", "").lower() for r in recs], dtype=object)
+        order = np.argsort(titles, kind="stable")
+    else:
+        # Default: recommendation_count + tmdb_rating
+        order = np.lexsort((-_column(recs, "tmdb_rating"), -_column(recs, "recommendation_count")))
+    return [recs[i] for i in order]
 
 
 def _merge_genre_recs(main: list[dict], genre: list[dict]) -> list[dict]:
     """Append genre recs that are not already in main."""
     seen = {r.get("title", "").lower() for r in main}
     for rec in genre:
-        if rec.get("title", "").lower() not in seen:
+        key = rec.get("title", "").lower()
+        if key not in seen:
             main.append(rec)
-            seen.add(rec.get("title", "").lower())
+            seen.add(key)
     return main
 
 
-def _fetch_omdb_ratings(rec: dict) -> None:
-    """Enrich *rec* in-place with imdb_id, imdb_rating, rotten_tomatoes_rating."""
-    tmdb_id = rec.get("tmdb_id")
-    if not tmdb_id:
-        return
+def _external_ratings(tmdb_id) -> dict:
+    """Return imdb_id / imdb_rating / rotten_tomatoes_rating for a TMDB id.
+
+    Complete answers are cached on disk; partial ones (a request failed part
+    way) are returned but not stored, so the next call retries.
+    """
+    key = f"ratings:{tmdb_id}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    found: dict = {}
     try:
-        r = requests.get(
+        r = _http.get(
             f"https://api.themoviedb.org/3/movie/{tmdb_id}",
             params={"api_key": TMDB_API_KEY},
             timeout=2,
         )
         if r.status_code != 200:
-            return
+            return found
         imdb_id = r.json().get("imdb_id")
         if not imdb_id:
-            return
-        rec["imdb_id"] = imdb_id
-        omdb = requests.get(
-            f"http://www.omdbapi.com/?i={imdb_id}&apikey={OMDB_API_KEY}",
-            timeout=2,
-        )
-        if omdb.status_code == 200:
-            data = omdb.json()
-            if data.get("Response") == "True":
-                rec["imdb_rating"] = data.get("imdbRating")
-                for rating in data.get("Ratings", []):
-                    if rating.get("Source") == "Rotten Tomatoes":
-                        rec["rotten_tomatoes_rating"] = rating.get("Value")
-                        break
+            _api_cache.set(key, found)
+            return found
+        found["imdb_id"] = imdb_id
+        omdb = _omdb_ratings(imdb_id, timeout=2)
+        if omdb is None:
+            return found
+        found.update(omdb)
+        _api_cache.set(key, found)
     except Exception:
         pass
+    return found
+
+
+def _fetch_omdb_ratings(rec: dict) -> None:
+    """Enrich *rec* in-place with imdb_id, imdb_rating, rotten_tomatoes_rating."""
+    tmdb_id = rec.get("tmdb_id")
+    if tmdb_id:
+        prebuilt = load_enrichment().get("ratings", {}).get(str(tmdb_id))
+        rec.update(prebuilt if prebuilt is not None else _external_ratings(tmdb_id))
+
+
+def _omdb_query(key: str, query: str, timeout: float, with_id: bool = False) -> dict | None:
+    """Shared OMDB lookup behind _omdb_ratings and _omdb_title_ratings."""
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    try:
+        r = _http.get(f"http://www.omdbapi.com/?{query}&apikey={OMDB_API_KEY}", timeout=timeout)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+    except Exception:
+        return None
+    found = {}
+    if data.get("Response") == "True":
+        if with_id and data.get("imdbID"):
+            found["imdb_id"] = data["imdbID"]
+        found["imdb_rating"] = data.get("imdbRating")
+        for rating in data.get("Ratings", []):
+            if rating.get("Source") == "Rotten Tomatoes":
+                found["rotten_tomatoes_rating"] = rating.get("Value")
+                break
+    _api_cache.set(key, found)
+    return found
+
+
+def _omdb_ratings(imdb_id: str, timeout: float = 5) -> dict | None:
+    """Return OMDB's imdb_rating / rotten_tomatoes_rating for *imdb_id*.
+
+    Cached on disk; returns None (uncached) if OMDB could not be reached.
+    """
+    return _omdb_query(f"omdb:{imdb_id}", f"i={imdb_id}", timeout)
+
+
+def _omdb_title_ratings(title: str, year: int, timeout: float = 2) -> dict | None:
+    """Return imdb_id / imdb_rating / rotten_tomatoes_rating by title and year.
+
+    One OMDB call instead of a TMDB detail call followed by an OMDB one.
+    Cached on disk; returns None (uncached) if OMDB could not be reached.
+    """
+    query = f"t={quote_plus(title)}" + (f"&y={year}" if year else "")
+    return _omdb_query(f"omdb-title:{title.lower()}:{year}", query, timeout, with_id=True)
+
+
+def _fetch_search_ratings(rec: dict) -> None:
+    """_fetch_omdb_ratings for TMDB search hits.
+
+    Ratings already known for the TMDB id win; a cold lookup goes straight
+    to OMDB by title and year.
+    """
+    tmdb_id = rec.get("tmdb_id")
+    known = load_enrichment().get("ratings", {}).get(str(tmdb_id))
+    if known is None:
+        known = _api_cache.get(f"ratings:{tmdb_id}", None)
+    if known is None and rec.get("title"):
+        known = _omdb_title_ratings(rec["title"], rec.get("year", 0))
+    rec.update(known or {})
+
+
+def _tmdb_movie_detail(tmdb_id: int) -> dict:
+    """Full TMDB detail (with credits and similar titles) for the movie page.
+
+    Cached on disk; raises if TMDB does not answer with the movie.
+    """
+    key = f"movie:{tmdb_id}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    r = _http.get(
+        f"https://api.themoviedb.org/3/movie/{tmdb_id}",
+        params={"api_key": TMDB_API_KEY, "append_to_response": "credits,similar"},
+        timeout=10,
+    )
+    r.raise_for_status()
+    movie = r.json()
+    _api_cache.set(key, movie)
+    return movie
+
+
+def _tmdb_search(query: str) -> list[dict]:
+    """TMDB's first page of movie search results for *query* (cached on disk)."""
+    key = f"search:{query}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    r = _http.get(
+        "https://api.themoviedb.org/3/search/movie",
+        params={"api_key": TMDB_API_KEY, "query": query, "page": 1},
+        timeout=5,
+    )
+    r.raise_for_status()
+    results = r.json().get("results", [])
+    _api_cache.set(key, results)
+    return results
+
+
+def _wiki_summary(title: str) -> dict:
+    """Return ``{"url", "summary"}`` from Wikipedia's page summary ({} if none)."""
+    key = f"wiki-summary:{title}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    try:
+        r = _http.get(f"https://en.wikipedia.org/api/rest_v1/page/summary/{quote_plus(title)}", timeout=5)
+        found = {}
+        if r.status_code == 200:
+            data = r.json()
+            found = {
+                "url": data.get("content_urls", {}).get("desktop", {}).get("page", ""),
+                "summary": data.get("extract", ""),
+            }
+    except Exception:
+        return {}
+    if r.status_code in (200, 404):
+        _api_cache.set(key, found)
+    return found
+
+
+def _wiki_production_facts(title: str) -> dict:
+    """Filming locations, production time and camera info mined from Wikipedia.
+
+    Only the extracted fields are cached, not the article text.
+    """
+    key = f"wiki-facts:{title}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    facts = {"filming_locations": [], "production_time": None, "camera_info": None}
+    try:
+        r = _http.get(
+            "https://en.wikipedia.org/w/api.php",
+            params={
+                "action": "query", "prop": "extracts", "exintro": False,
+                "explaintext": True, "titles": title, "format": "json",
+            },
+            timeout=5,
+        )
+        if r.status_code != 200:
+            return facts
+        pages = r.json().get("query", {}).get("pages", {})
+        content = list(pages.values())[0].get("extract", "") if pages else ""
+    except Exception:
+        return facts
+    # First five distinct locations in article order, without matching the rest.
+    locations: dict = {}
+    for m in _WIKI_LOCATION_RE.finditer(content):
+        locations.setdefault(m.group(1), None)
+        if len(locations) == 5:
+            break
+    facts["filming_locations"] = list(locations)
+    tm = _WIKI_PRODUCTION_RE.search(content)
+    facts["production_time"] = tm.group(1).strip() if tm else None
+    cm = _WIKI_CAMERA_RE.search(content)
+    facts["camera_info"] = cm.group(1).strip() if cm else None
+    _api_cache.set(key, facts)
+    return facts
 
 # ---------------------------------------------------------------------------
 # Prediction engine
@@ -210,13 +855,12 @@ def generate_prediction_reasons(movie, user_films, calculated_percent, genre_mat
         return _clean_title(t)
 
     if genre_matches:
+        films = user_films.attrs["films"]
         matched_with_ratings = []
         for match_title in genre_matches:
-            match_norm = _normalize_title(match_title)
-            for _, film in user_films.iterrows():
-                if _normalize_title(film.get("film_title", "")) == match_norm:
-                    matched_with_ratings.append((match_title, film.get("rating", 0)))
-                    break
+            pos = films["title_index"].get(_normalize_title(match_title))
+            if pos is not None:
+                matched_with_ratings.append((match_title, films["half_stars"][pos] / 2))
         matched_with_ratings.sort(key=lambda x: x[1], reverse=True)
 
         if matched_with_ratings:
@@ -246,10 +890,9 @@ def generate_prediction_reasons(movie, user_films, calculated_percent, genre_mat
         if calculated_percent <= 45:
             reasons.append("No similar movies in your history")
         else:
-            loved = user_films[user_films["rating"] >= 4.0].nlargest(2, "rating")
-            if not loved.empty:
-                titles = [_clean_title(f.get("film_title", "")) for _, f in loved.iterrows()]
-                reasons.append(f"You liked {', '.join(titles[:2])}")
+            films = user_films.attrs.get("films")
+            if films and films["top_loved"]:
+                reasons.append(f"You liked {', '.join(films['top_loved'])}")
 
     while len(reasons) < 3:
         reasons.append("Based on movie rating")
@@ -257,102 +900,177 @@ def generate_prediction_reasons(movie, user_films, calculated_percent, genre_mat
     return list(dict.fromkeys(reasons))[:3]
 
 
-def predict_liking_percentage(movie, gorg_films, sali_films):
-    movie_rating = movie.get("tmdb_rating", 0)
-    movie_year = movie.get("year", 0)
-
-    genre_ids = movie.get("genre_ids", [])
-    if isinstance(genre_ids, str):
-        genre_ids = [int(g.strip()) for g in genre_ids.split(",") if g.strip().isdigit()]
-
-    source_movies = []
-    recommended_because = movie.get("recommended_because", "")
-    if isinstance(recommended_because, str):
-        source_movies = [s.strip() for s in recommended_because.split(",") if s.strip()]
-
-    def predict_for_user(user_films):
-        if user_films.empty or "rating" not in user_films.columns:
-            return max(35, min(45, (movie_rating / 10.0) * 100)), []
-
-        movie_norm = _normalize_title(movie.get("title", ""))
-        for _, film in user_films.iterrows():
-            if _normalize_title(film.get("film_title", "")) == movie_norm:
-                actual = film.get("rating", 0)
-                return (actual / 5.0) * 100, [film.get("film_title", "")]
-
-        source_matches = []
-        for src in source_movies:
-            src_norm = _normalize_title(src)
-            for _, film in user_films.iterrows():
-                if _normalize_title(film.get("film_title", "")) == src_norm:
-                    source_matches.append((film.get("rating", 0), film.get("film_title", "")))
-                    break
-
-        year_matches = []
+def _cap(x, hi):
+    """Elementwise ``min(hi, x)`` with Python's NaN semantics (NaN -> hi)."""
+    return np.where(x < hi, x, hi)
+
+
+def _floor(x, lo):
+    """Elementwise ``max(lo, x)`` with Python's NaN semantics (NaN -> lo)."""
+    return np.where(x > lo, x, lo)
+
+
+def _blend(source_avg: np.ndarray, tmdb_base: np.ndarray) -> np.ndarray:
+    """Blend the average rating of matched source films with the TMDB score.
+
+    Strong agreement with loved films is capped so a single match never
+    promises more than 75-85%; disliked sources pull the prediction down.
+    """
+    pred = (source_avg / 5.0) * 100 * 0.7 + tmdb_base * 0.3
+    pred = np.select(
+        [source_avg >= 4.5, source_avg >= 4.0, source_avg <= 2.5],
+        [_cap(pred, 85), _cap(pred, 75), _floor(_cap(pred, 45), 25)],
+        pred,
+    )
+    return _floor(_cap(pred, 85), 25)
+
+
+@lru_cache(maxsize=65536)
+def _source_norms(recommended_because: str) -> tuple:
+    """Normalised titles listed in a rec's comma-separated recommended_because."""
+    return tuple(_normalize_title(t.strip()) for t in recommended_because.split(",") if t.strip())
+
+
+def _predict_for_user(movies, films):
+    """Predict one user's liking percentage for each of *movies*.
+
+    *films* is the array bundle built by _prepare_films, or None when the
+    user has no rated history. Returns ``(percents, matches)`` where
+    *percents* is a float array and *matches* lists, per movie, the user's
+    films the prediction was based on.
+    """
+    n = len(movies)
+    movie_rating = np.array([m.get("tmdb_rating", 0) for m in movies], dtype=float)
+    tmdb_base = (movie_rating / 10.0) * 100
+
+    if films is None:
+        return _floor(_cap(tmdb_base, 45), 35), [[] for _ in movies]
+
+    title_index = films["title_index"]
+    by_year = films["by_year"]
+    half_stars = films["half_stars"]
+    titles = films["titles"]
+
+    exact = np.full(n, np.nan)
+    has_exact = np.zeros(n, dtype=bool)
+    src_count = np.zeros(n, dtype=int)
+    year_count = np.zeros(n, dtype=int)
+    src_pos, src_starts = [], []
+    year_pos, year_starts = [], []
+    matches = []
+
+    for i, movie in enumerate(movies):
+        pos = title_index.get(_normalize_title(movie.get("title", "")))
+        if pos is not None:
+            has_exact[i] = True
+            exact[i] = half_stars[pos]
+            matches.append([titles[pos]])
+            continue
+
+        because = movie.get("recommended_because", "")
+        sources = _source_norms(because) if isinstance(because, str) else ()
+        found = [title_index[k] for k in sources if k in title_index]
+
+        movie_year = movie.get("year", 0)
+        near = []
         if movie_year > 0:
-            for _, film in user_films.iterrows():
-                ym = re.search(r"\((\d{4})\)", str(film.get("film_title", "")))
-                if ym and abs(int(ym.group(1)) - movie_year) <= 5:
-                    year_matches.append((film.get("rating", 0), film.get("film_title", "")))
-
-        if source_matches:
-            ratings = [m[0] for m in source_matches]
-            avg = sum(ratings) / len(ratings)
-            tmdb_base = (movie_rating / 10.0) * 100
-            pred = (avg / 5.0) * 100 * 0.7 + tmdb_base * 0.3
-            if avg >= 4.5:
-                pred = min(85, pred)
-            elif avg >= 4.0:
-                pred = min(75, pred)
-            elif avg <= 2.5:
-                pred = max(25, min(45, pred))
-            return max(25, min(85, pred)), [m[1] for m in source_matches[:3]]
-
-        if len(year_matches) >= 3:
-            avg = sum(m[0] for m in year_matches) / len(year_matches)
-            tmdb_base = (movie_rating / 10.0) * 100
-            pred = (avg / 5.0) * 100 * 0.5 + tmdb_base * 0.5
-            return max(30, min(70, pred)), [m[1] for m in year_matches[:3]]
-
-        # No evidence — predict conservatively
-        if movie_rating >= 8.5:
-            pred = 40
-        elif movie_rating >= 7.5:
-            pred = 38
-        elif movie_rating >= 7.0:
-            pred = 35
-        elif movie_rating >= 6.0:
-            pred = 32
+            year = int(movie_year)
+            near = sorted(j for y in range(year - 5, year + 6) for j in by_year.get(y, ()))
+
+        if found:
+            src_count[i] = len(found)
+            src_starts.append(len(src_pos))
+            src_pos.extend(found)
+            matches.append(list(titles[found[:3]]))
+        elif len(near) >= 3:
+            year_count[i] = len(near)
+            year_starts.append(len(year_pos))
+            year_pos.extend(near)
+            matches.append(list(titles[near[:3]]))
         else:
-            pred = 28
-        return max(25, min(40, pred)), []
+            matches.append([])
+
+    # Average matched ratings per movie: one reduceat over the flattened
+    # half-star values, scattered back to the movies that had matches and
+    # converted back to stars.
+    src_avg = np.full(n, np.nan)
+    if src_pos:
+        sums = np.add.reduceat(half_stars[src_pos], src_starts, dtype=np.int64)
+        src_avg[src_count > 0] = sums / src_count[src_count > 0] / 2.0
+    year_avg = np.full(n, np.nan)
+    if year_pos:
+        sums = np.add.reduceat(half_stars[year_pos], year_starts, dtype=np.int64)
+        year_avg[year_count > 0] = sums / year_count[year_count > 0] / 2.0
+
+    src_pred = _blend(src_avg, tmdb_base)
+    year_pred = (year_avg / 5.0) * 100 * 0.5 + tmdb_base * 0.5
+    year_pred = _floor(_cap(year_pred, 70), 30)
+
+    # No evidence — predict conservatively
+    fallback = np.select(
+        [movie_rating >= 8.5, movie_rating >= 7.5, movie_rating >= 7.0, movie_rating >= 6.0],
+        [40, 38, 35, 32],
+        28,
+    )
 
-    gorg_pct, gorg_matches = predict_for_user(gorg_films)
-    sali_pct, sali_matches = predict_for_user(sali_films)
+    percents = np.select(
+        [has_exact, src_count > 0, year_count > 0],
+        [(exact / 10.0) * 100, src_pred, year_pred],
+        fallback,
+    )
+    return percents, matches
 
-    return {
-        "sali_percent": round(sali_pct),
-        "gorg_percent": round(gorg_pct),
-        "sali_reasons": generate_prediction_reasons(movie, sali_films, sali_pct, sali_matches),
-        "gorg_reasons": generate_prediction_reasons(movie, gorg_films, gorg_pct, gorg_matches),
-    }
+
+def _films(user_films):
+    """The prediction arrays of a scraped-films frame, or None without history."""
+    return None if user_films.empty else user_films.attrs.get("films")
+
+
+# What generate_prediction_reasons says for every movie when the user has no
+# rated films: the fallback prediction never rises above 45%.
+_NO_HISTORY_REASONS = ("No similar movies in your history", "Based on movie rating")
+
+
+def _reasons(movies, user_films, percents, matches) -> list[list[str]]:
+    if _films(user_films) is None:
+        return [list(_NO_HISTORY_REASONS) for _ in movies]
+    return [
+        generate_prediction_reasons(movie, user_films, percents[i], matches[i])
+        for i, movie in enumerate(movies)
+    ]
+
+
+def _predictions(movies, gorg_films, sali_films) -> list[dict]:
+    """Predicted percentages and reasons for both users, one dict per movie."""
+    gorg_pct, gorg_matches = _predict_for_user(movies, _films(gorg_films))
+    sali_pct, sali_matches = _predict_for_user(movies, _films(sali_films))
+    gorg_reasons = _reasons(movies, gorg_films, gorg_pct, gorg_matches)
+    sali_reasons = _reasons(movies, sali_films, sali_pct, sali_matches)
+    return [
+        {
+            "sali_percent": round(sali_pct[i]),
+            "gorg_percent": round(gorg_pct[i]),
+            "sali_reasons": sali_reasons[i],
+            "gorg_reasons": gorg_reasons[i],
+        }
+        for i in range(len(movies))
+    ]
+
+
+def predict_liking_percentage(movie, gorg_films, sali_films):
+    return _predictions([movie], gorg_films, sali_films)[0]
 
 
 def _add_predictions(recs, gorg_films, sali_films):
-    for rec in recs:
-        p = predict_liking_percentage(rec, gorg_films, sali_films)
-        rec.update({
-            "sali_percent": p["sali_percent"],
-            "gorg_percent": p["gorg_percent"],
-            "sali_reasons": p["sali_reasons"],
-            "gorg_reasons": p["gorg_reasons"],
-        })
+    for rec, p in zip(recs, _predictions(recs, gorg_films, sali_films)):
+        rec.update(p)
 
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
 
 @app.route("/")
+@cached_page()
 def index():
     recommendations, genre_recs, tv_recs, gorg_films, sali_films = load_data()
 
@@ -365,8 +1083,7 @@ def index():
         "sali_avg_rating": sali_films["rating"].mean() if not sali_films.empty and "rating" in sali_films.columns else 0,
     }
 
-    both_loved = _find_both_loved(gorg_films, sali_films, fetch_tmdb=True)
-    both_loved_sorted = sorted(both_loved, key=lambda x: (x["gorg_rating"] + x["sali_rating"]) / 2, reverse=True)
+    both_loved_sorted = get_both_loved()
 
     stats["both_loved_count"] = len(both_loved_sorted)
     stats["both_loved"] = both_loved_sorted[:5]
@@ -374,29 +1091,23 @@ def index():
 
     top_recommendations = []
     if not recommendations.empty:
-        recs_list = _clean_list(recommendations.to_dict("records"))
-        top_recommendations = _sort_recs(recs_list, "recommendation_count")[:6]
-        for rec in top_recommendations:
-            _fetch_omdb_ratings(rec)
+        top_recommendations = _top_recs(_rank_recs(recommendations), 6)
+        list(_http_pool.map(_fetch_omdb_ratings, top_recommendations))
 
     return render_template("index.html", stats=stats, top_recommendations=top_recommendations)
 
 
 @app.route("/both-loved")
+@cached_page(ttl=3600)
 def both_loved():
-    _, _, _, gorg_films, sali_films = load_data()
-    both_loved_list = _find_both_loved(gorg_films, sali_films, fetch_tmdb=True, include_avg=True)
-    both_loved_list = sorted(both_loved_list, key=lambda x: x.get("avg_rating", 0), reverse=True)
-    return render_template("both_loved.html", both_loved=both_loved_list)
+    return render_template("both_loved.html", both_loved=get_both_loved())
 
 
 @app.route("/recommendations")
+@cached_page()
 def recommendations():
-    recs_df, genre_df, tv_df, gorg_films, sali_films = load_data()
-
-    recs_list = _clean_list(recs_df.to_dict("records") if not recs_df.empty else [])
-    genre_list = _clean_list(genre_df.to_dict("records") if not genre_df.empty else [])
-    tv_list = _clean_list(tv_df.to_dict("records") if not tv_df.empty else [])
+    gorg_films, sali_films = load_user_films()
+    recs_list, genre_list, tv_list = load_records()
 
     recs_list = _merge_genre_recs(recs_list, genre_list)
     recs_list = _sort_recs(recs_list, "recommendation_count")
@@ -414,8 +1125,9 @@ def recommendations():
 
 
 @app.route("/api/recommendations")
+@shared_response(ttl=30, bypass=lambda: request.args.get("surprise", "false") == "true")
 def api_recommendations():
-    recs_df, genre_df, tv_df, gorg_films, sali_films = load_data()
+    gorg_films, sali_films = load_user_films()
 
     decade = request.args.get("decade", "")
     sort_by = request.args.get("sort_by", "recommendation_count")
@@ -423,42 +1135,7 @@ def api_recommendations():
     content_type = request.args.get("type", "all")
     genre_filter = request.args.get("genre", "")
 
-    if content_type == "tv":
-        recs_list = _clean_list(tv_df.to_dict("records") if not tv_df.empty else [])
-    elif content_type == "movies":
-        main = _clean_list(recs_df.to_dict("records") if not recs_df.empty else [])
-        genre = _clean_list(genre_df.to_dict("records") if not genre_df.empty else [])
-        recs_list = _merge_genre_recs(main, genre)
-    else:  # all
-        main = _clean_list(recs_df.to_dict("records") if not recs_df.empty else [])
-        genre = _clean_list(genre_df.to_dict("records") if not genre_df.empty else [])
-        tv = _clean_list(tv_df.to_dict("records") if not tv_df.empty else [])
-        recs_list = main + genre + tv
-
-    # Apply filters
-    filtered = []
-    for rec in recs_list:
-        year = int(rec.get("year", 0)) if str(rec.get("year", 0)).isdigit() else 0
-        if decade:
-            decade_start = int(decade)
-            if not (decade_start <= year < decade_start + 10):
-                continue
-        if genre_filter:
-            rec_genre = rec.get("genre", "").lower()
-            if rec_genre == genre_filter.lower():
-                filtered.append(rec)
-                continue
-            genre_ids_str = rec.get("genre_ids", "")
-            if genre_ids_str:
-                try:
-                    gids = [int(g.strip()) for g in str(genre_ids_str).split(",") if g.strip().isdigit()]
-                    names = [GENRE_ID_TO_NAME.get(g, "") for g in gids]
-                    if genre_filter.lower() in [n.lower() for n in names if n]:
-                        filtered.append(rec)
-                except Exception:
-                    pass
-            continue
-        filtered.append(rec)
+    filtered = select_records(content_type, decade, genre_filter)
 
     # Surprise Us
     surprise_movie = None
@@ -468,28 +1145,27 @@ def api_recommendations():
             if "Popular" not in str(r.get("recommended_because", ""))
         ]
         pool = watched_based or filtered
-        pool_sorted = sorted(pool, key=lambda x: float(x.get("recommendation_count", 0)), reverse=True)
-        surprise_movie = random.choice(pool_sorted[:10])
+        # clean_rec has already made every count a float
+        surprise_movie = random.choice(heapq.nlargest(10, pool, key=itemgetter("recommendation_count")))
         filtered = [r for r in filtered if r.get("tmdb_id") != surprise_movie.get("tmdb_id")]
 
     filtered = _sort_recs(filtered, sort_by)
-    _add_predictions(filtered, gorg_films, sali_films)
+    total = len(filtered)
+
+    # Optional paging; without per_page the whole list is returned as before.
+    per_page = request.args.get("per_page", type=int)
+    if per_page and per_page > 0:
+        page = max(request.args.get("page", 1, type=int), 1)
+        filtered = filtered[(page - 1) * per_page:page * per_page]
 
-    # Fetch OMDB ratings for first 10
-    for rec in filtered[:10]:
-        _fetch_omdb_ratings(rec)
+    # Only the records actually returned get predictions
+    extra = [surprise_movie] if surprise_movie else []
+    _add_predictions(filtered + extra, gorg_films, sali_films)
 
-    if surprise_movie:
-        p = predict_liking_percentage(surprise_movie, gorg_films, sali_films)
-        surprise_movie.update({
-            "sali_percent": p["sali_percent"],
-            "gorg_percent": p["gorg_percent"],
-            "sali_reasons": p["sali_reasons"],
-            "gorg_reasons": p["gorg_reasons"],
-        })
-        _fetch_omdb_ratings(surprise_movie)
+    # Fetch OMDB ratings for the first 10 (and the surprise pick) concurrently
+    list(_http_pool.map(_fetch_omdb_ratings, filtered[:10] + extra))
 
-    return jsonify({"surprise_movie": surprise_movie, "recommendations": filtered})
+    return jsonify({"surprise_movie": surprise_movie, "recommendations": filtered, "total": total})
 
 
 @app.route("/api/search")
@@ -500,16 +1176,10 @@ def api_search():
     if not query:
         return jsonify({"results": [], "error": "Query parameter is required"})
 
-    _, _, _, gorg_films, sali_films = load_data()
+    gorg_films, sali_films = load_user_films()
 
     try:
-        resp = requests.get(
-            "https://api.themoviedb.org/3/search/movie",
-            params={"api_key": TMDB_API_KEY, "query": query, "page": 1},
-            timeout=5,
-        )
-        resp.raise_for_status()
-        movies = resp.json().get("results", [])[:limit]
+        movies = _tmdb_search(query)[:limit]
     except Exception as e:
         return jsonify({"results": [], "error": str(e)})
 
@@ -530,25 +1200,21 @@ def api_search():
             "recommendation_count": 0,
             "recommended_because": "Your rating history",
         }
-        p = predict_liking_percentage(movie_dict, gorg_films, sali_films)
-        movie_dict.update({
-            "sali_percent": p["sali_percent"],
-            "gorg_percent": p["gorg_percent"],
-            "sali_reasons": p["sali_reasons"],
-            "gorg_reasons": p["gorg_reasons"],
-        })
-        _fetch_omdb_ratings(movie_dict)
         results.append(movie_dict)
 
+    _add_predictions(results, gorg_films, sali_films)
+    list(_http_pool.map(_fetch_search_ratings, results))
+
     return jsonify({"results": results})
 
 
 @app.route("/api/genres")
+@shared_response(ttl=3600)
 def get_genres():
     recommendations, _, _, _, _ = load_data()
     genres: set[str] = set()
     if not recommendations.empty and "genre_ids" in recommendations.columns:
-        for genre_str in recommendations["genre_ids"].dropna():
+        for genre_str in recommendations["genre_ids"].dropna().unique():
             if isinstance(genre_str, str):
                 genres.update(g.strip() for g in genre_str.split(","))
     return jsonify(sorted(genres))
@@ -557,83 +1223,30 @@ def get_genres():
 @app.route("/movie/<int:tmdb_id>")
 def movie_detail(tmdb_id):
     try:
-        resp = requests.get(
-            f"https://api.themoviedb.org/3/movie/{tmdb_id}",
-            params={"api_key": TMDB_API_KEY, "append_to_response": "credits,similar"},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        movie = resp.json()
+        movie = _tmdb_movie_detail(tmdb_id)
     except Exception as e:
         return f"Error loading movie: {e}", 404
 
-    # Wikipedia summary
-    wikipedia_url = wikipedia_summary = None
-    try:
-        wiki = requests.get(
-            f"https://en.wikipedia.org/api/rest_v1/page/summary/{quote_plus(movie['title'])}",
-            timeout=5,
-        )
-        if wiki.status_code == 200:
-            wd = wiki.json()
-            wikipedia_url = wd.get("content_urls", {}).get("desktop", {}).get("page", "")
-            wikipedia_summary = wd.get("extract", "")
-    except Exception:
-        pass
-
-    # Wikipedia details (filming locations etc.)
-    filming_locations, production_time, camera_info = [], None, None
-    try:
-        full_wiki = requests.get(
-            "https://en.wikipedia.org/w/api.php",
-            params={
-                "action": "query", "prop": "extracts", "exintro": False,
-                "explaintext": True, "titles": movie["title"], "format": "json",
-            },
-            timeout=5,
-        )
-        if full_wiki.status_code == 200:
-            pages = full_wiki.json().get("query", {}).get("pages", {})
-            content = list(pages.values())[0].get("extract", "") if pages else ""
-            loc_matches = re.findall(
-                r"(?:filmed|shot|produced)\s+(?:in|at)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-                content, re.IGNORECASE,
-            )
-            filming_locations = list(set(loc_matches[:5]))
-            tm = re.search(r"(?:production|filming)\s+(?:began|started|took|lasted)\s+([^\.]+)", content, re.IGNORECASE)
-            production_time = tm.group(1).strip() if tm else None
-            cm = re.search(r"(?:shot|filmed)\s+(?:on|with|using)\s+([^\.]+)", content, re.IGNORECASE)
-            camera_info = cm.group(1).strip() if cm else None
-    except Exception:
-        pass
+    # Wikipedia summary and details (filming locations etc.)
+    wiki = _wiki_summary(movie["title"])
+    wikipedia_url, wikipedia_summary = wiki.get("url"), wiki.get("summary")
+    facts = _wiki_production_facts(movie["title"])
+    filming_locations = facts["filming_locations"]
+    production_time, camera_info = facts["production_time"], facts["camera_info"]
 
     # OMDB ratings
-    imdb_rating = rotten_tomatoes_rating = imdb_id = None
     imdb_id = movie.get("imdb_id")
-    if imdb_id:
-        try:
-            omdb = requests.get(
-                f"http://www.omdbapi.com/?i={imdb_id}&apikey={OMDB_API_KEY}",
-                timeout=5,
-            )
-            if omdb.status_code == 200:
-                od = omdb.json()
-                if od.get("Response") == "True":
-                    imdb_rating = od.get("imdbRating")
-                    for r in od.get("Ratings", []):
-                        if r.get("Source") == "Rotten Tomatoes":
-                            rotten_tomatoes_rating = r.get("Value")
-                            break
-        except Exception:
-            pass
+    omdb = (_omdb_ratings(imdb_id) or {}) if imdb_id else {}
+    imdb_rating = omdb.get("imdb_rating")
+    rotten_tomatoes_rating = omdb.get("rotten_tomatoes_rating")
 
     def format_currency(amount):
         return f"${amount:,.0f}" if amount else "Not available"
 
     production_companies = [c.get("name", "") for c in movie.get("production_companies", [])]
     production_countries = [c.get("name", "") for c in movie.get("production_countries", [])]
-    release_date = movie.get("release_date", "")
-    year_shot = release_date[:4] if release_date else "N/A"
+    year_raw = (movie.get("release_date") or "")[:4]
+    year_shot = year_raw or "N/A"
 
     facts = []
     if production_companies:
@@ -651,10 +1264,10 @@ def movie_detail(tmdb_id):
     cast = movie.get("credits", {}).get("cast", [])[:10]
     similar = movie.get("similar", {}).get("results", [])[:6]
 
-    _, _, _, gorg_films, sali_films = load_data()
+    gorg_films, sali_films = load_user_films()
     movie_for_prediction = {
         "tmdb_rating": movie.get("vote_average", 0),
-        "year": int(release_date[:4]) if release_date and len(release_date) >= 4 else 0,
+        "year": int(year_raw) if year_raw.isdigit() else 0,
         "genre_ids": [g.get("id") for g in movie.get("genres", [])],
         "title": movie.get("title", ""),
     }
@@ -690,57 +1303,96 @@ def movie_detail(tmdb_id):
 # Shared helper
 # ---------------------------------------------------------------------------
 
-def _find_both_loved(gorg_films, sali_films, fetch_tmdb=False, include_avg=False):
+def _tmdb_poster_lookup(title) -> tuple:
+    """Return (tmdb_id, poster_url) for the top TMDB search hit on *title*."""
+    key = f"poster:{title}"
+    cached = _api_cache.get(key)
+    if cached is not MISSING:
+        return tuple(cached)
+    try:
+        title_clean = str(title).strip()
+        ym = _YEAR_RE.search(title_clean)
+        year = int(ym.group(1)) if ym else None
+        if ym:
+            title_clean = _YEAR_STRIP_RE.sub("", title_clean).strip()
+        params = {"api_key": TMDB_API_KEY, "query": title_clean}
+        if year:
+            params["year"] = year
+        r = _http.get("https://api.themoviedb.org/3/search/movie", params=params, timeout=3)
+        if r.status_code == 200:
+            found = (None, None)
+            results = r.json().get("results", [])
+            if results:
+                pp = results[0].get("poster_path", "")
+                found = (results[0].get("id"), f"https://image.tmdb.org/t/p/w500{pp}" if pp else None)
+            _api_cache.set(key, found)
+            return found
+    except Exception:
+        pass
+    return None, None
+
+
+def _find_both_loved(gorg_films, sali_films, include_avg=False):
     result = []
-    if gorg_films.empty or sali_films.empty:
+    if gorg_films.empty or sali_films.empty or "rating" not in gorg_films or "rating" not in sali_films:
         return result
 
-    for _, gm in gorg_films.iterrows():
-        if not (gm.get("rating") and gm["rating"] >= 4.0):
-            continue
-        lower = str(gm["film_title"]).lower()
-        match = sali_films[sali_films["film_title"].str.lower() == lower]
-        if match.empty:
-            continue
-        sali_rating = match.iloc[0].get("rating", 0)
-        if not (sali_rating and sali_rating >= 4.0):
-            continue
+    # Hash-join on the lowercased title, keeping only Sali's first row per
+    # title. A left join preserves Gorg's row order for the stable sorts below.
+    gorg = gorg_films[gorg_films["rating"] >= 4.0]
+    sali = sali_films.dropna(subset=["_key"]).drop_duplicates("_key")
+    joined = gorg.merge(sali[["_key", "rating"]], on="_key", how="left", suffixes=("", "_sali"))
+    joined = joined[joined["rating_sali"] >= 4.0]
 
+    for title, gorg_rating, sali_rating in zip(joined["film_title"], joined["rating"], joined["rating_sali"]):
         entry = {
-            "title": gm["film_title"],
-            "gorg_rating": gm["rating"],
+            "title": title,
+            "gorg_rating": gorg_rating,
             "sali_rating": sali_rating,
             "tmdb_id": None,
             "poster_url": None,
         }
         if include_avg:
-            entry["avg_rating"] = (gm["rating"] + sali_rating) / 2
-
-        if fetch_tmdb:
-            try:
-                title_clean = str(gm["film_title"]).strip()
-                ym = re.search(r"\((\d{4})\)", title_clean)
-                year = int(ym.group(1)) if ym else None
-                if ym:
-                    title_clean = re.sub(r"\s*\(\d{4}\)\s*", "", title_clean).strip()
-                params = {"api_key": TMDB_API_KEY, "query": title_clean}
-                if year:
-                    params["year"] = year
-                r = requests.get("https://api.themoviedb.org/3/search/movie", params=params, timeout=3)
-                if r.status_code == 200:
-                    results = r.json().get("results", [])
-                    if results:
-                        entry["tmdb_id"] = results[0].get("id")
-                        pp = results[0].get("poster_path", "")
-                        if pp:
-                            entry["poster_url"] = f"https://image.tmdb.org/t/p/w500{pp}"
-            except Exception:
-                pass
-
+            entry["avg_rating"] = (gorg_rating + sali_rating) / 2
         result.append(entry)
+
     return result
 
 
+@lru_cache(maxsize=1)
+def _both_loved_all(film_stamps: tuple, enrichment_stamp: float | None) -> list[dict]:
+    gorg_films, sali_films = load_user_films()
+    both_loved = _find_both_loved(gorg_films, sali_films, include_avg=True)
+    posters = load_enrichment().get("posters", {})
+    for entry in both_loved:
+        if entry["title"] in posters:
+            entry["tmdb_id"], entry["poster_url"] = posters[entry["title"]]
+    return sorted(both_loved, key=lambda x: x["avg_rating"], reverse=True)
+
+
+def get_both_loved() -> list[dict]:
+    """Films both users rated 4+, with posters, best average first.
+
+    The join and the sidecar's posters are shared by the homepage and
+    /both-loved and rebuilt only when either user's CSV or the enrichment
+    sidecar changes. Titles the sidecar lacks are looked up on every call
+    (the API cache keeps answers), so a failed lookup is retried rather
+    than memoised. Callers must not mutate the returned list.
+    """
+    films = tuple(_mtime(os.path.join(DATA_DIR, f)) for f in FILM_FILES)
+    both_loved = _both_loved_all(films, _mtime(os.path.join(DATA_DIR, ENRICHMENT_FILE)))
+    posters = load_enrichment().get("posters", {})
+    missing = list(dict.fromkeys(e["title"] for e in both_loved if e["title"] not in posters))
+    if not missing:
+        return both_loved
+    found = dict(zip(missing, _http_pool.map(_tmdb_poster_lookup, missing)))
+    return [
+        {**e, "tmdb_id": found[e["title"]][0], "poster_url": found[e["title"]][1]}
+        if e["title"] in found else e
+        for e in both_loved
+    ]
+
+
 # ---------------------------------------------------------------------------
 # Background pipeline scheduler
 # ---------------------------------------------------------------------------
@@ -748,8 +1400,64 @@ def _find_both_loved(gorg_films, sali_films, fetch_tmdb=False, include_avg=False
 _pipeline_lock = threading.Lock()
 
 
+def build_enrichment() -> None:
+    """Prefetch TMDB posters and IMDB/RT ratings for the current CSVs.
+
+    The results are written to the enrichment sidecar, which the routes read
+    instead of calling TMDB/OMDB while a visitor waits. Failed or empty
+    lookups are left out so the routes retry them live.
+
+    Every gunicorn worker may call this at once; a lock file next to the
+    sidecar lets one of them build it while the others skip.
+    """
+    path = os.path.join(DATA_DIR, ENRICHMENT_FILE)
+    with open(f"{path}.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("Enrichment already being built by another worker — skipping.")
+            return
+        data = _collect_enrichment()
+        # A per-writer temp name, so no other writer can truncate it mid-dump.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    print(f"Enrichment saved: {len(data['posters'])} posters, {len(data['ratings'])} ratings.")
+
+
+def _collect_enrichment() -> dict:
+    recs, genre, tv, gorg_films, sali_films = load_data()
+    titles = [e["title"] for e in _find_both_loved(gorg_films, sali_films)]
+    tmdb_ids = list(dict.fromkeys(
+        tmdb_id
+        for df in (recs, genre, tv) if "tmdb_id" in df.columns
+        for tmdb_id in df["tmdb_id"].dropna()
+    ))
+
+    with ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS, thread_name_prefix="enrich") as pool:
+        posters = dict(zip(titles, pool.map(_tmdb_poster_lookup, titles)))
+        ratings = dict(zip(map(str, tmdb_ids), pool.map(_external_ratings, tmdb_ids)))
+    return {
+        "posters": {t: p for t, p in posters.items() if p[0] is not None},
+        "ratings": {k: r for k, r in ratings.items() if r},
+    }
+
+
+def _run_enrichment():
+    try:
+        build_enrichment()
+    except Exception:
+        print("❌ Enrichment failed:")
+        traceback.print_exc()
+
+
 def _run_pipeline_and_reload():
-    """Run the full data pipeline then invalidate the CSV cache."""
+    """Run the data pipeline, invalidate the CSV cache, prune the API cache, then prebuild enrichment."""
     if not _pipeline_lock.acquire(blocking=False):
         print("Pipeline already running — skipping.")
         return
@@ -758,6 +1466,9 @@ def _run_pipeline_and_reload():
         run_pipeline(data_dir=DATA_DIR)
         invalidate_cache()
         print("CSV cache invalidated — fresh data will be served.")
+        # Search keys are visitor-controlled, so expired rows would pile up.
+        _api_cache.prune()
+        _run_enrichment()
     finally:
         _pipeline_lock.release()
 
@@ -786,6 +1497,8 @@ def _start_scheduler():
         threading.Thread(target=_run_pipeline_and_reload, daemon=True).start()
     else:
         print("Existing data found — loading from cache.")
+        if not os.path.exists(os.path.join(DATA_DIR, ENRICHMENT_FILE)):
+            threading.Thread(target=_run_enrichment, daemon=True).start()
 
 
 # Start the scheduler when the module is imported by gunicorn / flask run.
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings used by the Procfile and railway.json.
+
+Requests spend most of their time waiting on TMDB/OMDB, so each worker is a
+gthread worker with a pool of request threads; the shared HTTP session and
+caches in app.py are thread-safe. Every worker also starts its own pipeline
+scheduler, so scale with threads rather than processes.
+
+The app is not preloaded in the master (the scheduler and HTTP pool threads
+would not survive the fork); instead each worker warms its caches before it
+accepts requests.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+timeout = 120
+
+
+def post_worker_init(worker):
+    from app import warm_caches
+
+    warm_caches()
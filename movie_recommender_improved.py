@@ -8,13 +8,19 @@ Generates movie recommendations based on:
 3. Genre preferences from favourite movies
 """
 
+import csv
 import os
 import re
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+from api_cache import MISSING, DiskCache
 
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "2073a6aadc1cb24381bc90c83ace363a")
 
@@ -23,7 +29,7 @@ MIN_VOTE_COUNT = 500
 MIN_YEAR = 1970
 MAX_YEAR = 2026
 
-SUPERHERO_GENRES = [28, 878, 12]
+SUPERHERO_GENRES = frozenset({28, 878, 12})
 SUPERHERO_KEYWORDS = [
     "superhero", "spider-man", "batman", "superman", "iron man",
     "captain america", "avengers", "x-men", "guardians of the galaxy",
@@ -32,31 +38,88 @@ SUPERHERO_KEYWORDS = [
     "deadpool", "venom", "doctor strange", "black panther", "shazam",
 ]
 
-PRIORITY_GENRES = [9648, 18, 53]  # Mystery, Drama, Thriller
+# Every keyword in one alternation, so a title is scanned once rather than per keyword.
+_SUPERHERO_RE = re.compile("|".join(re.escape(kw) for kw in SUPERHERO_KEYWORDS))
+
+PRIORITY_GENRES = frozenset({9648, 18, 53})  # Mystery, Drama, Thriller
+
+# Loved movies are looked up concurrently; TMDB answers 429 if we go too fast.
+TMDB_WORKERS = 8
+
+# One keep-alive pool shared by the workers, so each call skips the TLS handshake.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=TMDB_WORKERS))
+
+# Lookups are memoised for the run and persisted in the app's API cache file,
+# so the next scheduled run reuses them. Failures are only remembered per run.
+TMDB_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
 
 _tmdb_cache: dict = {}
+_disk_cache: DiskCache | None = None
 
 
+# A "(YYYY)" year with its surrounding spaces, or any punctuation character.
+_STRIP_RE = re.compile(r"\s*\(\d{4}\)\s*|[^\w\s]")
+# A "(YYYY)" year in a scraped title: captured, or with its surrounding spaces.
+_YEAR_RE = re.compile(r"\((\d{4})\)")
+_YEAR_STRIP_RE = re.compile(r"\s*\(\d{4}\)\s*")
+
+
+# The same suggestion titles come back for many loved films.
+@lru_cache(maxsize=65536)
 def _normalize_title(title) -> str:
     if not title:
         return ""
-    t = str(title).lower().strip()
-    t = re.sub(r"\s*\(\d{4}\)\s*", "", t)
-    t = " ".join(t.split())
-    t = re.sub(r"[^\w\s]", "", t)
-    return t
+    # Collapsing whitespace first lets one pass strip years and punctuation.
+    return _STRIP_RE.sub("", " ".join(str(title).lower().split()))
+
+
+def _read_films(path):
+    """(title, normalised title, rating) for each row; a blank rating reads as 0."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["film_title"], _normalize_title(row["film_title"]), float(row["rating"] or 0))
+            for row in csv.DictReader(f)
+        ]
+
+
+@dataclass(slots=True)
+class _Suggestion:
+    """Running tally for one suggested title across every loved film."""
+
+    count: float = 0.0
+    sources: list = field(default_factory=list)
+    tmdb_data: dict | None = None
+    genre_ids: list = field(default_factory=list)
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
 
 
 def _tmdb_get(url, params, cache_key=None):
     if cache_key and cache_key in _tmdb_cache:
         return _tmdb_cache[cache_key]
+    if cache_key and _disk_cache is not None:
+        data = _disk_cache.get(f"recommender:{cache_key}")
+        if data is not MISSING:
+            _tmdb_cache[cache_key] = data
+            return data
     try:
-        r = requests.get(url, params=params, timeout=10)
+        for _ in range(3):
+            r = _http.get(url, params=params, timeout=10)
+            if r.status_code != 429:
+                break
+            time.sleep(float(r.headers.get("Retry-After", 1)))
         r.raise_for_status()
         data = r.json()
-        time.sleep(0.25)
         if cache_key:
             _tmdb_cache[cache_key] = data
+            if _disk_cache is not None:
+                _disk_cache.set(f"recommender:{cache_key}", data)
         return data
     except Exception as exc:
         print(f"  TMDB error: {exc}")
@@ -67,10 +130,10 @@ def _tmdb_get(url, params, cache_key=None):
 
 def _search_movie(title, year=None):
     title_clean = str(title).strip()
-    ym = re.search(r"\((\d{4})\)", title_clean)
+    ym = _YEAR_RE.search(title_clean)
     if ym and not year:
         year = int(ym.group(1))
-        title_clean = re.sub(r"\s*\(\d{4}\)\s*", "", title_clean).strip()
+        title_clean = _YEAR_STRIP_RE.sub("", title_clean).strip()
     ck = f"{title_clean}_{year}" if year else title_clean
     data = _tmdb_get(
         "https://api.themoviedb.org/3/search/movie",
@@ -83,24 +146,77 @@ def _search_movie(title, year=None):
 
 
 def _get_details(tmdb_id):
+    # Recommendations and similar titles ride along in the same request.
     data = _tmdb_get(
         f"https://api.themoviedb.org/3/movie/{tmdb_id}",
-        {"api_key": TMDB_API_KEY},
+        {"api_key": TMDB_API_KEY, "append_to_response": "recommendations,similar"},
         cache_key=f"detail_{tmdb_id}",
     )
     return data
 
 
-def _get_related(tmdb_id, kind="recommendations", limit=10):
-    data = _tmdb_get(
-        f"https://api.themoviedb.org/3/movie/{tmdb_id}/{kind}",
-        {"api_key": TMDB_API_KEY},
+def _get_related(details, kind="recommendations", limit=10):
+    related = details.get(kind) if isinstance(details, dict) else None
+    return (related.get("results", []) if isinstance(related, dict) else [])[:limit]
+
+
+def _fetch_suggestions(title):
+    """Return (tmdb_id, recommended + similar movies) for a loved *title*.
+
+    The details are cached, so the genre step below reuses them.
+    """
+    info = _search_movie(title)
+    if not (info and info.get("id")):
+        return None, []
+    tmdb_id = info["id"]
+    details = _get_details(tmdb_id)
+    return tmdb_id, _get_related(details, "recommendations") + _get_related(details, "similar")
+
+
+def _discover(genre_id):
+    """Popular, well-rated movies in *genre_id* released in the allowed years."""
+    return _tmdb_get(
+        "https://api.themoviedb.org/3/discover/movie",
+        {
+            "api_key": TMDB_API_KEY,
+            "with_genres": genre_id,
+            "sort_by": "popularity.desc",
+            "vote_average.gte": 7.0,
+            "primary_release_date.gte": f"{MIN_YEAR}-01-01",
+            "primary_release_date.lte": f"{MAX_YEAR}-12-31",
+        },
     )
-    return (data.get("results", []) if isinstance(data, dict) else [])[:limit]
 
 
-def _is_superhero(title, genre_ids):
-    if any(kw in title.lower() for kw in SUPERHERO_KEYWORDS):
+def _index_by_length(titles):
+    """Bucket normalised titles longer than 8 characters by their length."""
+    by_len = defaultdict(list)
+    for t in titles:
+        if len(t) > 8:
+            by_len[len(t)].append(t)
+    return by_len
+
+
+def _fuzzy_watched(title_norm, watched_by_len):
+    """True if a watched title contains (or is contained in) *title_norm*.
+
+    Both titles must be longer than 8 characters and their lengths within a
+    0.7 ratio, so only the buckets inside that window are scanned.
+    """
+    n = len(title_norm)
+    if n <= 8:
+        return False
+    for size in range(int(n * 0.7), int(n / 0.7) + 1):
+        for wt in watched_by_len.get(size, ()):
+            if title_norm in wt or wt in title_norm:
+                shorter, longer = sorted([n, size])
+                if shorter / longer > 0.7:
+                    return True
+    return False
+
+
+def _is_superhero(title_lower, genre_ids):
+    if _SUPERHERO_RE.search(title_lower):
         return True
     action_count = sum(1 for g in genre_ids if g in SUPERHERO_GENRES)
     return action_count >= 2 and len(genre_ids) <= 4
@@ -108,136 +224,143 @@ def _is_superhero(title, genre_ids):
 
 def run(data_dir: str = ".") -> None:
     """Run the full movie recommendation pipeline, writing CSVs to *data_dir*."""
+    global _disk_cache
+    _tmdb_cache.clear()
+    _disk_cache = DiskCache(os.path.join(data_dir, "api_cache.sqlite"), ttl=TMDB_CACHE_TTL)
+
     gorg_path = os.path.join(data_dir, "gorg_scraped_films.csv")
     sali_path = os.path.join(data_dir, "salicore_scraped_films.csv")
 
     print("Loading movie data...")
-    gorg_df = pd.read_csv(gorg_path)
-    sali_df = pd.read_csv(sali_path)
-    print(f"Gorg has {len(gorg_df)} films, Sali has {len(sali_df)} films")
-
-    gorg_watched = set(gorg_df["film_title"].apply(_normalize_title))
-    sali_watched = set(sali_df["film_title"].apply(_normalize_title))
-    all_watched = (
-        set(gorg_df["film_title"].str.lower().str.strip())
-        | set(sali_df["film_title"].str.lower().str.strip())
-    )
+    gorg_films = _read_films(gorg_path)
+    sali_films = _read_films(sali_path)
+    print(f"Gorg has {len(gorg_films)} films, Sali has {len(sali_films)} films")
+
+    gorg_watched = {norm for _, norm, _ in gorg_films}
+    sali_watched = {norm for _, norm, _ in sali_films}
+    all_watched = {title.lower().strip() for title, _, _ in gorg_films + sali_films}
+    watched_union = gorg_watched | sali_watched
     both_watched = gorg_watched & sali_watched
 
     print(f"Both watched: {len(both_watched)}")
 
     # --- Find movies both loved ---
+    # Sali's rating of the first film with each normalised title
+    sali_by_norm = {}
+    for _, norm, rating in sali_films:
+        sali_by_norm.setdefault(norm, rating)
+
     both_loved = []
-    for row in gorg_df.itertuples():
-        if not (row.rating and row.rating >= 4.0):
+    for title, norm, rating in gorg_films:
+        if rating < 4.0:
             continue
-        norm = _normalize_title(row.film_title)
-        match = sali_df[sali_df["film_title"].apply(_normalize_title) == norm]
-        if match.empty:
-            continue
-        sr = match.iloc[0]["rating"]
+        sr = sali_by_norm.get(norm)
         if sr and sr >= 4.0:
             both_loved.append({
-                "title": row.film_title,
-                "gorg_rating": row.rating,
+                "title": title,
+                "gorg_rating": rating,
                 "sali_rating": sr,
-                "avg_rating": (row.rating + sr) / 2,
+                "avg_rating": (rating + sr) / 2,
             })
     both_loved.sort(key=lambda x: x["avg_rating"], reverse=True)
     print(f"Found {len(both_loved)} movies both loved")
 
     # --- Generate recommendations from loved movies ---
-    recommendations: dict = defaultdict(lambda: {"count": 0, "sources": [], "tmdb_data": None, "genre_ids": []})
+    watched_by_len = _index_by_length(watched_union)
+    recommendations: dict[str, _Suggestion] = {}
+
+    # Each distinct loved title is looked up once; the genre step reuses the ids.
+    loved_titles = list(dict.fromkeys(loved["title"] for loved in both_loved))
+    with ThreadPoolExecutor(max_workers=TMDB_WORKERS) as pool:
+        fetched = dict(zip(loved_titles, pool.map(_fetch_suggestions, loved_titles)))
 
+    # The per-film trace is written in one go after the scan, not line by line.
+    processed = []
     for loved in both_loved:
-        info = _search_movie(loved["title"])
-        if not (info and info.get("id")):
+        tmdb_id, all_suggestions = fetched[loved["title"]]
+        if tmdb_id is None:
             continue
-        tmdb_id = info["id"]
-        print(f"  Processing: {loved['title']} (TMDB {tmdb_id})")
-
-        details = _get_details(tmdb_id)
-        all_suggestions = _get_related(tmdb_id, "recommendations") + _get_related(tmdb_id, "similar")
+        processed.append(f"  Processing: {loved['title']} (TMDB {tmdb_id})")
+        loved_norm = _normalize_title(loved["title"])
 
         for movie in all_suggestions:
             title = movie.get("title", "")
-            title_norm = _normalize_title(title)
+            title_lower = title.lower().strip()
             rating = movie.get("vote_average", 0)
             votes = movie.get("vote_count", 0)
             rd = movie.get("release_date", "")
             year = int(rd[:4]) if rd and len(rd) >= 4 else 0
             genre_ids = movie.get("genre_ids", [])
 
-            watched = (
-                title_norm in gorg_watched
-                or title_norm in sali_watched
-                or title.lower().strip() in all_watched
-                or title_norm == _normalize_title(loved["title"])
-            )
-            if not watched:
-                for wt in gorg_watched | sali_watched:
-                    if len(title_norm) > 8 and len(wt) > 8:
-                        if title_norm in wt or wt in title_norm:
-                            shorter, longer = sorted([len(title_norm), len(wt)])
-                            if shorter / longer > 0.7:
-                                watched = True
-                                break
-            if watched:
+            # Cheap numeric rejects first; the fuzzy watched scan runs last.
+            is_priority = not PRIORITY_GENRES.isdisjoint(genre_ids)
+            threshold = 5.5 if is_priority else MIN_TMDB_RATING
+            if rating < threshold or votes < MIN_VOTE_COUNT or not (MIN_YEAR <= year <= MAX_YEAR):
                 continue
 
-            if _is_superhero(title, genre_ids) and rating < 8.5:
+            if _is_superhero(title_lower, genre_ids) and rating < 8.5:
                 continue
 
-            is_priority = any(g in PRIORITY_GENRES for g in genre_ids)
-            threshold = 5.5 if is_priority else MIN_TMDB_RATING
-            if rating < threshold or votes < MIN_VOTE_COUNT or not (MIN_YEAR <= year <= MAX_YEAR):
+            title_norm = _normalize_title(title)
+            if (
+                title_norm in watched_union
+                or title_lower in all_watched
+                or title_norm == loved_norm
+                or _fuzzy_watched(title_norm, watched_by_len)
+            ):
                 continue
 
             weight = 3.0 if is_priority else 1.0
-            recommendations[title]["count"] += weight
-            recommendations[title]["sources"].append(loved["title"])
-            if not recommendations[title]["tmdb_data"]:
-                recommendations[title]["tmdb_data"] = movie
-                recommendations[title]["genre_ids"] = genre_ids
+            rec = recommendations.get(title)
+            if rec is None:
+                rec = recommendations[title] = _Suggestion()
+            rec.count += weight
+            rec.sources.append(loved["title"])
+            if not rec.tmdb_data:
+                rec.tmdb_data = movie
+                rec.genre_ids = genre_ids
+
+    if processed:
+        print("\n".join(processed))
 
     # --- Build CSV rows ---
     sorted_recs = sorted(
         recommendations.items(),
-        key=lambda x: x[1]["count"] * 2 + (x[1]["tmdb_data"].get("vote_average", 0) if x[1]["tmdb_data"] else 0),
+        key=lambda x: x[1].count * 2 + (x[1].tmdb_data.get("vote_average", 0) if x[1].tmdb_data else 0),
         reverse=True,
     )
 
     rows = []
     for title, data in sorted_recs[:25]:
-        td = data["tmdb_data"]
+        td = data.tmdb_data
         if not td:
             continue
-        if _normalize_title(title) in (gorg_watched | sali_watched):
+        if _normalize_title(title) in watched_union:
             continue
         rd = td.get("release_date", "N/A")
         pp = td.get("poster_path", "")
         rows.append({
             "title": title,
             "year": rd[:4] if rd != "N/A" else "N/A",
-            "tmdb_rating": td.get("vote_average", 0),
+            "tmdb_rating": float(td.get("vote_average", 0)),
             "overview": td.get("overview") or "No overview available",
-            "recommended_because": ", ".join(data["sources"][:3]),
-            "recommendation_count": data["count"],
+            "recommended_because": ", ".join(data.sources[:3]),
+            "recommendation_count": data.count,
             "tmdb_id": td.get("id"),
             "poster_url": f"https://image.tmdb.org/t/p/w500{pp}" if pp else None,
-            "genre_ids": ", ".join(map(str, data.get("genre_ids", []))),
+            "genre_ids": ", ".join(map(str, data.genre_ids)),
         })
 
     if rows:
-        pd.DataFrame(rows).to_csv(os.path.join(data_dir, "movie_recommendations_improved.csv"), index=False)
+        _write_csv(os.path.join(data_dir, "movie_recommendations_improved.csv"), rows)
         print(f"✅ Saved {len(rows)} movie recommendations")
 
     # --- Genre-based recommendations ---
     genre_counts: dict[str, int] = defaultdict(int)
     for loved in both_loved[:10]:
-        info = _search_movie(loved["title"])
-        if info and info.get("id"):
-            det = _get_details(info["id"])
+        tmdb_id = fetched[loved["title"]][0]
+        if tmdb_id is not None:
+            det = _get_details(tmdb_id)
             if det:
                 for g in det.get("genres", []):
                     genre_counts[g["name"]] += 1
@@ -254,30 +377,24 @@ def run(data_dir: str = ".") -> None:
         "Sci-Fi": 878, "Science Fiction": 878,
     }
 
+    genre_ids = list(dict.fromkeys(genre_id_map[g] for g in top_genres if genre_id_map.get(g)))
+    with ThreadPoolExecutor(max_workers=TMDB_WORKERS) as pool:
+        discovered = dict(zip(genre_ids, pool.map(_discover, genre_ids)))
+
     genre_rows = []
     for gname in top_genres:
         gid = genre_id_map.get(gname)
         if not gid:
             continue
-        data = _tmdb_get(
-            "https://api.themoviedb.org/3/discover/movie",
-            {
-                "api_key": TMDB_API_KEY,
-                "with_genres": gid,
-                "sort_by": "popularity.desc",
-                "vote_average.gte": 7.0,
-                "primary_release_date.gte": f"{MIN_YEAR}-01-01",
-                "primary_release_date.lte": f"{MAX_YEAR}-12-31",
-            },
-        )
+        data = discovered[gid]
         if not data:
             continue
         limit = 20 if gname in priority_names else 10
         for movie in data.get("results", [])[:limit]:
             tn = _normalize_title(movie.get("title", ""))
-            if tn in gorg_watched or tn in sali_watched:
+            if tn in watched_union:
                 continue
-            if _is_superhero(movie.get("title", ""), movie.get("genre_ids", [])):
+            if _is_superhero(movie.get("title", "").lower(), movie.get("genre_ids", [])):
                 continue
             threshold = 5.5 if gname in priority_names else MIN_TMDB_RATING
             if movie.get("vote_average", 0) < threshold or movie.get("vote_count", 0) < MIN_VOTE_COUNT:
@@ -286,7 +403,7 @@ def run(data_dir: str = ".") -> None:
             genre_rows.append({
                 "title": movie["title"],
                 "year": movie.get("release_date", "")[:4] or "N/A",
-                "tmdb_rating": movie.get("vote_average"),
+                "tmdb_rating": float(movie["vote_average"]),
                 "genre": gname,
                 "tmdb_id": movie.get("id"),
                 "poster_url": f"https://image.tmdb.org/t/p/w500{pp}" if pp else None,
@@ -296,9 +413,13 @@ def run(data_dir: str = ".") -> None:
             })
 
     if genre_rows:
-        gdf = pd.DataFrame(genre_rows).drop_duplicates(subset=["title"]).sort_values("tmdb_rating", ascending=False)
-        gdf.to_csv(os.path.join(data_dir, "genre_recommendations.csv"), index=False)
-        print(f"✅ Saved {len(gdf)} genre recommendations")
+        # First row per title, best rated first.
+        unique: dict = {}
+        for row in genre_rows:
+            unique.setdefault(row["title"], row)
+        genre_rows = sorted(unique.values(), key=lambda row: row["tmdb_rating"], reverse=True)
+        _write_csv(os.path.join(data_dir, "genre_recommendations.csv"), genre_rows)
+        print(f"✅ Saved {len(genre_rows)} genre recommendations")
 
     print("Movie recommendation pipeline complete.")
 
@@ -8,11 +8,12 @@ derived from movies both users loved.
 
 import os
 import re
-import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "2073a6aadc1cb24381bc90c83ace363a")
 
@@ -31,16 +32,42 @@ TV_GENRE_MAP = {
 }
 
 
+# The genre pages are fetched concurrently over one keep-alive pool; a handful
+# of parallel requests is well inside TMDB's rate limit.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(TV_GENRE_MAP)))
+
+_YEAR_STRIP_RE = re.compile(r"\s*\(\d{4}\)\s*")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
 def _normalize_title(title) -> str:
     if not title:
         return ""
     t = str(title).lower().strip()
-    t = re.sub(r"\s*\(\d{4}\)\s*", "", t)
+    t = _YEAR_STRIP_RE.sub("", t)
     t = " ".join(t.split())
-    t = re.sub(r"[^\w\s]", "", t)
+    t = _PUNCT_RE.sub("", t)
     return t
 
 
+def _discover_tv(genre_id):
+    resp = _http.get(
+        "https://api.themoviedb.org/3/discover/tv",
+        params={
+            "api_key": TMDB_API_KEY,
+            "with_genres": genre_id,
+            "sort_by": "popularity.desc",
+            "vote_average.gte": MIN_TMDB_RATING,
+            "first_air_date.gte": f"{MIN_YEAR}-01-01",
+            "first_air_date.lte": f"{MAX_YEAR}-12-31",
+        },
+        timeout=10,
+    )
+    resp.raise_for_status()
+    return resp.json().get("results", [])
+
+
 def run(data_dir: str = ".") -> None:
     """Run the TV recommendation pipeline, writing CSVs to *data_dir*."""
     gorg_path = os.path.join(data_dir, "gorg_scraped_films.csv")
@@ -56,24 +83,11 @@ def run(data_dir: str = ".") -> None:
     tv_recs: dict = defaultdict(lambda: {"count": 0, "sources": [], "tmdb_data": None})
 
     print("Getting popular TV shows by genre...")
-    for genre_name, genre_id in TV_GENRE_MAP.items():
+    with ThreadPoolExecutor(max_workers=len(TV_GENRE_MAP)) as pool:
+        pending = {name: pool.submit(_discover_tv, gid) for name, gid in TV_GENRE_MAP.items()}
+    for genre_name, future in pending.items():
         try:
-            resp = requests.get(
-                "https://api.themoviedb.org/3/discover/tv",
-                params={
-                    "api_key": TMDB_API_KEY,
-                    "with_genres": genre_id,
-                    "sort_by": "popularity.desc",
-                    "vote_average.gte": MIN_TMDB_RATING,
-                    "first_air_date.gte": f"{MIN_YEAR}-01-01",
-                    "first_air_date.lte": f"{MAX_YEAR}-12-31",
-                },
-                timeout=10,
-            )
-            resp.raise_for_status()
-            time.sleep(0.25)
-
-            for tv in resp.json().get("results", [])[:15]:
+            for tv in future.result()[:15]:
                 name = tv.get("name", "")
                 norm = _normalize_title(name)
                 if norm in gorg_watched or norm in sali_watched: